@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# =============================================================================
+# Keepalive Proxy for the Claude Code Sub-Agent Wrapper
+#
+# Every sub-agent is a fresh `claude` process, so every run pays a new
+# TCP + TLS handshake to the API. This proxy runs once, listens on
+# localhost and forwards requests over a pooled (HTTP/2 if available)
+# upstream connection that stays warm across sub-agent runs.
+#
+# Setup:
+#   pip install "httpx[http2]"
+#
+# Usage:
+#   python proxy.py --port 8787 &
+#   python subagent_template.py --task "Your task" --proxy-url http://127.0.0.1:8787
+# =============================================================================
+"""
+Keepalive reverse proxy for sub-agent API traffic.
+
+Accepts plain HTTP/1.1 on localhost and forwards each request to the
+upstream API (z.ai by default) through a shared httpx.AsyncClient.
+Responses are streamed back chunk by chunk, so server-sent events reach
+the CLI as soon as they arrive.
+
+Environment variables:
+- ANTHROPIC_BASE_URL or ZAI_BASE_URL (optional) - Upstream API endpoint
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from typing import List, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:
+    sys.exit('proxy.py requires httpx: pip install "httpx[http2]"')
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+from subagent_template import DEFAULT_BASE_URL
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+DEFAULT_PORT = 8787
+MAX_KEEPALIVE_CONNECTIONS = 32
+KEEPALIVE_EXPIRY = 300  # Seconds an idle upstream connection stays open
+UPSTREAM_TIMEOUT = 300.0  # Matches the wrapper's default API_TIMEOUT_MS
+
+# Headers that describe a single hop and must not be forwarded
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "host", "content-length",
+}
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: List[Tuple[str, str]]) -> bytes:
+    """Read a request body framed by Content-Length or chunked encoding."""
+    lookup = {name.lower(): value for name, value in headers}
+    if "chunked" in lookup.get("transfer-encoding", "").lower():
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                # Skip trailers up to the blank line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return bytes(body)
+            body.extend(await reader.readexactly(size))
+            await reader.readline()
+    length = int(lookup.get("content-length", "0") or 0)
+    return await reader.readexactly(length) if length else b""
+
+
+async def _forward(
+    client: httpx.AsyncClient,
+    upstream: str,
+    method: str,
+    target: str,
+    headers: List[Tuple[str, str]],
+    body: bytes,
+    writer: asyncio.StreamWriter,
+) -> None:
+    """Send one request upstream and stream the response back."""
+    forward_headers = [(k, v) for k, v in headers if k.lower() not in HOP_BY_HOP_HEADERS]
+    request = client.build_request(method, upstream + target, headers=forward_headers, content=body)
+    try:
+        response = await client.send(request, stream=True)
+    except httpx.HTTPError as e:
+        message = f"Upstream error: {e}".encode()
+        writer.write(
+            b"HTTP/1.1 502 Bad Gateway\r\nContent-Type: text/plain\r\n"
+            + f"Content-Length: {len(message)}\r\n\r\n".encode() + message
+        )
+        await writer.drain()
+        return
+
+    try:
+        has_body = method != "HEAD" and response.status_code >= 200 and response.status_code not in (204, 304)
+        head = [f"HTTP/1.1 {response.status_code} {response.reason_phrase}\r\n"]
+        for name, value in response.headers.multi_items():
+            if name.lower() not in HOP_BY_HOP_HEADERS:
+                head.append(f"{name}: {value}\r\n")
+        if has_body:
+            head.append("Transfer-Encoding: chunked\r\n")
+        head.append("\r\n")
+        writer.write("".join(head).encode("latin-1"))
+
+        if has_body:
+            # Raw bytes: Content-Encoding is passed through untouched
+            try:
+                async for chunk in response.aiter_raw():
+                    if chunk:
+                        writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                        await writer.drain()
+            except httpx.HTTPError as e:
+                # The status line is already out: drop the downstream
+                # connection so the client sees a truncated response
+                raise ConnectionError(f"Upstream error mid-response: {e}") from e
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()
+    finally:
+        await response.aclose()
+
+
+async def _handle_connection(
+    client: httpx.AsyncClient,
+    upstream: str,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
+    """Serve HTTP/1.1 requests on one downstream connection until it closes."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            method, target, _ = request_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+
+            headers: List[Tuple[str, str]] = []
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers.append((name.strip(), value.strip()))
+
+            body = await _read_body(reader, headers)
+            await _forward(client, upstream, method, target, headers, body, writer)
+
+            connection = next((v for k, v in headers if k.lower() == "connection"), "")
+            if connection.lower() == "close":
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int, upstream: str) -> None:
+    """Run the proxy until cancelled."""
+    limits = httpx.Limits(
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(UPSTREAM_TIMEOUT, connect=10.0)
+    async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=limits, timeout=timeout) as client:
+        server = await asyncio.start_server(
+            lambda r, w: _handle_connection(client, upstream, r, w), host, port
+        )
+        protocol = "HTTP/2" if HTTP2_AVAILABLE else "HTTP/1.1"
+        print(f"[proxy] http://{host}:{port} -> {upstream} ({protocol} keepalive)", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Keepalive proxy for Claude Code sub-agents",
+        epilog="Point the wrapper at it with --proxy-url http://127.0.0.1:PORT"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Listen address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"Listen port (default: {DEFAULT_PORT})")
+    parser.add_argument("--upstream", help="Upstream API base URL (default: ANTHROPIC_BASE_URL, "
+                                           "ZAI_BASE_URL or the z.ai endpoint)")
+    args = parser.parse_args(argv)
+
+    upstream = (
+        args.upstream or
+        os.environ.get("ANTHROPIC_BASE_URL") or
+        os.environ.get("ZAI_BASE_URL") or
+        DEFAULT_BASE_URL
+    ).rstrip("/")
+
+    try:
+        asyncio.run(serve(args.host, args.port, upstream))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -43,16 +43,31 @@ Environment variables (set before running):
 - ANTHROPIC_BASE_URL or ZAI_BASE_URL (optional) - API endpoint
 """
 
-import argparse
+import contextlib
+import functools
+import itertools
 import json
 import os
+import queue
+import selectors
+import shutil
 import signal
+import stat
 import subprocess
 import sys
-import threading
 import time
 import uuid
-from typing import Optional, Dict, Any, List
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple
+
+if TYPE_CHECKING:
+    import socket
+
+# orjson is optional: it parses stream events several times faster than json
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 
 # =============================================================================
@@ -60,6 +75,11 @@ from typing import Optional, Dict, Any, List
 # =============================================================================
 DEFAULT_BASE_URL = "https://api.z.ai/api/anthropic"  # z.ai endpoint
 DEFAULT_API_TIMEOUT_MS = "300000"  # 5 min timeout
+LOG_BUFFER_SIZE = 65536  # Log files are flushed per 64KB, not per line
+READ_CHUNK_SIZE = 65536  # Max bytes read from a child pipe per wakeup
+SPINNER_INTERVAL = 0.2  # Seconds between spinner frames
+DEFAULT_POOL_SIZE = 2  # Warm CLI processes per SubagentPool (SUBAGENT_POOL_SIZE)
+DEFAULT_SOCKET_PATH = "/tmp/glm-native-subagent/serve.sock"  # `serve` listener
 SPINNER_FRAMES = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
 
 # ANSI color codes for terminal output
@@ -89,12 +109,42 @@ def _safe_truncate(s: str, n: int = 250) -> str:
     return s[:n] + ("..." if len(s) > n else "")
 
 
-def _build_env() -> Dict[str, str]:
-    """Build environment with API credentials from env vars."""
-    env = os.environ.copy()
+class _LazyFile:
+    """Binary log file that is created (with its directory) on first write.
+
+    Short runs often produce no stderr at all; this skips the mkdir and
+    the open/close for logs that would stay empty.
+    """
+
+    def __init__(self, path: str, buffering: int = -1):
+        self.path = path
+        self.buffering = buffering
+        self._f = None
+
+    def write(self, data: bytes) -> None:
+        if self._f is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._f = open(self.path, "wb", buffering=self.buffering)
+        self._f.write(data)
+
+    def flush(self) -> None:
+        if self._f is not None:
+            self._f.flush()
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
 
+def _build_env(proxy_url: Optional[str] = None) -> Dict[str, str]:
+    """Build environment with API credentials from env vars.
+
+    proxy_url, if set, replaces the API endpoint with a local keepalive
+    proxy (see proxy.py) that forwards to the configured endpoint.
+    """
     # Check for API token (required)
-    token = env.get("ANTHROPIC_AUTH_TOKEN") or env.get("ZAI_API_KEY")
+    token = os.environ.get("ANTHROPIC_AUTH_TOKEN") or os.environ.get("ZAI_API_KEY")
     if not token:
         raise ValueError(
             "Missing API token!\n"
@@ -104,14 +154,18 @@ def _build_env() -> Dict[str, str]:
             "Get your API key from: https://z.ai/subscribe"
         )
 
-    env["ANTHROPIC_AUTH_TOKEN"] = token
-    env["ANTHROPIC_BASE_URL"] = (
-        env.get("ANTHROPIC_BASE_URL") or
-        env.get("ZAI_BASE_URL") or
+    base_url = proxy_url or (
+        os.environ.get("ANTHROPIC_BASE_URL") or
+        os.environ.get("ZAI_BASE_URL") or
         DEFAULT_BASE_URL
     )
-    env.setdefault("API_TIMEOUT_MS", DEFAULT_API_TIMEOUT_MS)
-    return env
+    # Single dict construction instead of copy() + per-key assignments
+    return {
+        **os.environ,
+        "ANTHROPIC_AUTH_TOKEN": token,
+        "ANTHROPIC_BASE_URL": base_url,
+        "API_TIMEOUT_MS": os.environ.get("API_TIMEOUT_MS", DEFAULT_API_TIMEOUT_MS),
+    }
 
 
 def _kill_process_group(proc: subprocess.Popen, grace_seconds: int = 5) -> None:
@@ -132,6 +186,226 @@ def _kill_process_group(proc: subprocess.Popen, grace_seconds: int = 5) -> None:
             pass
 
 
+def _close_pipes(proc: subprocess.Popen) -> None:
+    """Close proc's pipe file objects (the I/O loop reads the raw fds)."""
+    for pipe in (proc.stdin, proc.stdout, proc.stderr):
+        if pipe is not None:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+def _open_pidfd(proc: subprocess.Popen) -> Optional[int]:
+    """Open a pidfd for proc (Linux 5.3+), or None if unsupported."""
+    try:
+        return os.pidfd_open(proc.pid)
+    except (AttributeError, OSError):
+        return None
+
+
+# Sub-agent behavior prompt
+SUBAGENT_PROMPT = """You are a coding sub-agent. Complete the given task efficiently.
+Guidelines:
+- Read existing files before modifying them
+- Use Edit tool for surgical changes to existing files
+- Use Write tool only for new files
+- Follow existing project conventions
+- When done, provide a clear summary of what you accomplished"""
+
+
+@functools.lru_cache(maxsize=None)
+def _claude_executable() -> str:
+    """Resolve the claude CLI once, so each spawn is a single execve.
+
+    Without a path the forked child walks PATH with one execve per entry
+    while the (vforked) parent waits. If not found, fall back to the bare
+    name so Popen still raises FileNotFoundError.
+    """
+    return shutil.which("claude") or "claude"
+
+
+def _communicate(
+    proc: subprocess.Popen,
+    inactivity_timeout: int,
+    max_timeout: Optional[int],
+) -> Tuple[bytes, bytes, Optional[str]]:
+    """Collect all output of a non-streaming run. Returns (stdout, stderr, error).
+
+    json output has no tool events to reset the heartbeat, so the
+    inactivity window runs from the start, capped by max_timeout - the
+    same limits the I/O loop applies.
+    """
+    if max_timeout and max_timeout < inactivity_timeout:
+        timeout, error = max_timeout, f"Max timeout ceiling reached: {max_timeout}s"
+    else:
+        timeout, error = inactivity_timeout, f"Inactivity timeout: no tool use for {inactivity_timeout}s"
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+        return stdout, stderr, None
+    except subprocess.TimeoutExpired:
+        _kill_process_group(proc)
+        try:
+            # Bounded: a descendant outside the group may still hold the pipes
+            stdout, stderr = proc.communicate(timeout=2)
+        except subprocess.TimeoutExpired:
+            stdout, stderr = b"", b""
+        return stdout or b"", stderr or b"", error
+
+
+def _build_cmd(
+    task: Optional[str],
+    allowed_tools: Optional[str] = None,
+    skip_permissions: bool = True,
+    stream_json: bool = False,
+    max_budget_usd: Optional[float] = None,
+) -> List[str]:
+    """Build the claude CLI command line.
+
+    With task=None the task is read from stdin as a stream-json user
+    message instead of argv (used by SubagentPool); output is stream-json.
+    """
+    if task is None:
+        cmd: List[str] = [_claude_executable(), "-p", "--input-format", "stream-json",
+                          "--output-format", "stream-json", "--verbose"]
+    else:
+        output_format = "stream-json" if stream_json else "json"
+        cmd = [_claude_executable(), "-p", task, "--output-format", output_format]
+        if stream_json:
+            cmd.append("--verbose")
+
+    if skip_permissions:
+        cmd.append("--dangerously-skip-permissions")
+    elif allowed_tools:
+        cmd.extend(["--allowedTools", allowed_tools])
+
+    cmd.extend(["--append-system-prompt", SUBAGENT_PROMPT])
+    cmd.append("--no-session-persistence")
+
+    if max_budget_usd is not None:
+        cmd.extend(["--max-budget-usd", str(max_budget_usd)])
+    return cmd
+
+
+def _spawn_claude(
+    cmd: List[str],
+    cwd: str,
+    env: Dict[str, str],
+    stdin: int = subprocess.DEVNULL,
+) -> subprocess.Popen:
+    """Start the CLI in its own process group with binary stdout/stderr pipes.
+
+    stdin defaults to /dev/null: a CLI that gets its task from argv must
+    never wait on stdin. Only SubagentPool passes PIPE to send the task.
+
+    start_new_session keeps CPython's vfork() fast path (3.10+); a
+    preexec_fn would force a full fork(), so don't add one.
+    """
+    return subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        env=env,
+        stdin=stdin,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+
+
+class SubagentPool:
+    """
+    Warm pool of pre-spawned ``claude`` processes for orchestrators.
+
+    Each process is started with ``--input-format stream-json`` and idles
+    on stdin until run_subagent() hands it a task, so the CLI's startup
+    (Node.js, config, API session) overlaps with earlier work instead of
+    delaying the next task. A process serves exactly one task - it keeps
+    the fresh-context isolation of a cold start - and a replacement is
+    spawned as soon as one is taken.
+
+    All processes share one configuration (cwd, tools, permissions,
+    budget, proxy); run_subagent() only uses the pool when its arguments
+    match.
+
+    Usage:
+        with SubagentPool(working_dir="/path/to/project") as pool:
+            for task in tasks:
+                run_subagent(task, working_dir="/path/to/project", pool=pool)
+    """
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        working_dir: Optional[str] = None,
+        allowed_tools: Optional[str] = None,
+        skip_permissions: bool = True,
+        max_budget_usd: Optional[float] = None,
+        proxy_url: Optional[str] = None,
+    ):
+        self.size = size or int(os.environ.get("SUBAGENT_POOL_SIZE", DEFAULT_POOL_SIZE))
+        self.cwd = working_dir or os.getcwd()
+        self.allowed_tools = allowed_tools
+        self.skip_permissions = skip_permissions
+        self.max_budget_usd = max_budget_usd
+        self.proxy_url = proxy_url
+        self.cmd = _build_cmd(None, allowed_tools, skip_permissions, True, max_budget_usd)
+        self._env = _build_env(proxy_url)
+        self._idle: "queue.Queue[subprocess.Popen]" = queue.Queue()
+        self._closed = False
+        for _ in range(self.size):
+            self._idle.put(_spawn_claude(self.cmd, self.cwd, self._env, subprocess.PIPE))
+
+    def matches(
+        self,
+        working_dir: Optional[str],
+        allowed_tools: Optional[str],
+        skip_permissions: bool,
+        max_budget_usd: Optional[float],
+        proxy_url: Optional[str] = None,
+    ) -> bool:
+        """Check whether a run with these settings can use this pool."""
+        return (
+            (working_dir or os.getcwd()) == self.cwd
+            and skip_permissions == self.skip_permissions
+            and (skip_permissions or allowed_tools == self.allowed_tools)
+            and max_budget_usd == self.max_budget_usd
+            and proxy_url == self.proxy_url
+        )
+
+    def acquire(self) -> subprocess.Popen:
+        """Take a warm process and spawn its replacement."""
+        proc = None
+        while proc is None:
+            try:
+                proc = self._idle.get_nowait()
+            except queue.Empty:
+                proc = _spawn_claude(self.cmd, self.cwd, self._env, subprocess.PIPE)
+            if proc.poll() is not None:
+                # Died while idle; discard it
+                _close_pipes(proc)
+                proc = None
+        if not self._closed:
+            self._idle.put(_spawn_claude(self.cmd, self.cwd, self._env, subprocess.PIPE))
+        return proc
+
+    def close(self) -> None:
+        """Kill all idle processes."""
+        self._closed = True
+        while True:
+            try:
+                proc = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            _kill_process_group(proc, grace_seconds=1)
+            _close_pipes(proc)
+
+    def __enter__(self) -> "SubagentPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
 def run_subagent(
     task: str,
     working_dir: Optional[str] = None,
@@ -143,6 +417,8 @@ def run_subagent(
     show_prompt: bool = False,
     max_budget_usd: Optional[float] = None,
     debug: bool = False,
+    pool: Optional[SubagentPool] = None,
+    proxy_url: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Run Claude Code CLI as a sub-agent with custom API backend.
@@ -158,6 +434,9 @@ def run_subagent(
         show_prompt: Display the full prompt before execution
         max_budget_usd: Max cost ceiling
         debug: Write debug logs
+        pool: Warm SubagentPool to take the CLI process from (used only
+            when its settings match this run; otherwise a cold start)
+        proxy_url: Send API traffic through a local keepalive proxy
 
     Returns:
         Dict with: success, result, session_id, error, artifacts
@@ -167,43 +446,25 @@ def run_subagent(
         time the agent uses a tool. Long tasks run indefinitely if active;
         stalled tasks are detected and killed quickly.
     """
-    env = _build_env()
     cwd = working_dir or os.getcwd()
+    pooled = pool is not None and pool.matches(
+        working_dir, allowed_tools, skip_permissions, max_budget_usd, proxy_url
+    )
+    # Pooled processes always emit stream-json, even without progress display
+    stream_json = stream_progress or pooled
+    env = None if pooled else _build_env(proxy_url)
     run_id = uuid.uuid4().hex[:10]
 
-    # Log file paths
+    # Log file paths (files are only created once there is output to log)
     artifacts_dir = os.path.join("/tmp", "glm-native-subagent")
-    os.makedirs(artifacts_dir, exist_ok=True)
 
     stream_log = os.path.join(artifacts_dir, f"run_{run_id}.stream.jsonl") if stream_progress else None
     stdout_log = os.path.join(artifacts_dir, f"run_{run_id}.stdout.txt")
     stderr_log = os.path.join(artifacts_dir, f"run_{run_id}.stderr.txt")
 
-    # Build command
-    output_format = "stream-json" if stream_progress else "json"
-    cmd: List[str] = ["claude", "-p", task, "--output-format", output_format]
-
-    if stream_progress:
-        cmd.append("--verbose")
-
-    if skip_permissions:
-        cmd.append("--dangerously-skip-permissions")
-    elif allowed_tools:
-        cmd.extend(["--allowedTools", allowed_tools])
-
-    # Sub-agent behavior prompt
-    subagent_prompt = """You are a coding sub-agent. Complete the given task efficiently.
-Guidelines:
-- Read existing files before modifying them
-- Use Edit tool for surgical changes to existing files
-- Use Write tool only for new files
-- Follow existing project conventions
-- When done, provide a clear summary of what you accomplished"""
-    cmd.extend(["--append-system-prompt", subagent_prompt])
-    cmd.append("--no-session-persistence")
-
-    if max_budget_usd is not None:
-        cmd.extend(["--max-budget-usd", str(max_budget_usd)])
+    cmd = pool.cmd if pooled else _build_cmd(
+        task, allowed_tools, skip_permissions, stream_json, max_budget_usd
+    )
 
     # Debug logging
     debug_log = None
@@ -245,127 +506,230 @@ Guidelines:
     }
 
     final_result_event: Optional[Dict[str, Any]] = None
-    stop_spinner = threading.Event()
     last_tool_name_printed = None
 
     # Heartbeat tracking for inactivity timeout
     last_activity_time = time.time()
-    activity_lock = threading.Lock()
-
-    def spinner_loop():
-        # Skip spinner if stdout is not a real terminal
-        if not sys.stdout.isatty():
-            return
-        i = 0
-        while not stop_spinner.is_set():
-            frame = SPINNER_FRAMES[i % len(SPINNER_FRAMES)]
-            i += 1
-            sys.stdout.write(f"\r[subagent] {run_id} running {frame}")
-            sys.stdout.flush()
-            time.sleep(0.2)
-        sys.stdout.write("\r" + " " * 60 + "\r")
-        sys.stdout.flush()
 
+    # Spinner is ticked from the I/O loop, and only on a real terminal
+    show_spinner = sys.stdout.isatty()
+    spinner_frames = itertools.cycle(SPINNER_FRAMES)
+    spinner_prefix = f"\r[subagent] {run_id} running "
+    tool_prefix = f"\n[subagent] {run_id} 🔧 "
+    complete_line = f"\n[subagent] {run_id} ✅ complete\n"
+    stdout_write = sys.stdout.write
+    stdout_flush = sys.stdout.flush
+
+    # Fast path: with json output and no spinner there is nothing to show
+    # and no heartbeat to track while the child runs, so a single
+    # communicate() replaces the I/O loop
+    fast_path = not stream_json and not show_spinner
+
+    proc: Optional[subprocess.Popen] = None
     try:
-        proc = subprocess.Popen(
-            cmd,
-            cwd=cwd,
-            env=env,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            start_new_session=True,
-            bufsize=1,
-        )
-
-        # CRITICAL: Close stdin immediately to prevent hang
-        if proc.stdin:
+        if pooled:
+            proc = pool.acquire()
+            # Hand over the task, then close stdin so the CLI exits after it
+            proc.stdin.write(json.dumps(
+                {"type": "user", "message": {"role": "user", "content": task}}
+            ).encode() + b"\n")
             proc.stdin.close()
+        else:
+            proc = _spawn_claude(cmd, cwd, env)
+
+        # Log files: created on first write, buffered (flushed per chunk only
+        # in debug mode), binary so output is logged byte-for-byte
+        stdout_f = _LazyFile(stdout_log, buffering=LOG_BUFFER_SIZE)
+        stderr_f = _LazyFile(stderr_log)
+        stream_f = (
+            _LazyFile(stream_log, buffering=LOG_BUFFER_SIZE)
+            if stream_log else None
+        )
 
-        # Open log files
-        stdout_f = open(stdout_log, "w", encoding="utf-8")
-        stderr_f = open(stderr_log, "w", encoding="utf-8")
-        stream_f = open(stream_log, "w", encoding="utf-8") if stream_log else None
-
-        spinner_thread = threading.Thread(target=spinner_loop, daemon=True)
-        spinner_thread.start()
-
-        def read_stdout():
+        def handle_stream_line(line: bytes) -> None:
+            """Parse one stream-json line: heartbeat, progress display, result."""
             nonlocal final_result_event, last_tool_name_printed, last_activity_time
-            assert proc.stdout is not None
-            for line in proc.stdout:
-                # Write to log files (full fidelity)
-                stdout_f.write(line)
-                stdout_f.flush()
-                if stream_progress and stream_f:
-                    stream_f.write(line)
-                    stream_f.flush()
-
-                # Parse stream events for progress display
+            line_stripped = line.strip()
+            if not line_stripped:
+                return
+            # Only assistant/result events are used; skip parsing the rest
+            if (b'"type":"assistant"' not in line_stripped
+                    and b'"type":"result"' not in line_stripped):
+                return
+            try:
+                event = _json_loads(line_stripped)
+            except ValueError:
+                # JSONDecodeError, or UnicodeDecodeError from json.loads(bytes)
+                return
+
+            etype = event.get("type", "")
+            if etype == "assistant":
+                blocks = event.get("message", {}).get("content")
+                if not blocks:
+                    return
+                tools = [
+                    block.get("name") or "tool"
+                    for block in blocks
+                    if isinstance(block, dict) and block.get("type") == "tool_use"
+                ]
+                if not tools:
+                    return
+                # HEARTBEAT: Reset inactivity timer on tool use
+                last_activity_time = time.time()
                 if stream_progress:
-                    line_stripped = line.strip()
-                    if not line_stripped:
-                        continue
-                    try:
-                        event = json.loads(line_stripped)
-                    except json.JSONDecodeError:
-                        continue
-
-                    etype = event.get("type", "")
-                    if etype == "assistant":
-                        for block in event.get("message", {}).get("content", []):
-                            if isinstance(block, dict) and block.get("type") == "tool_use":
-                                tool_name = block.get("name") or "tool"
-                                # HEARTBEAT: Reset inactivity timer on tool use
-                                with activity_lock:
-                                    last_activity_time = time.time()
-                                # Only print unique tool names (deduplication)
-                                if tool_name != last_tool_name_printed:
-                                    last_tool_name_printed = tool_name
-                                    sys.stdout.write(f"\n[subagent] {run_id} 🔧 {tool_name}\n")
-                                    sys.stdout.flush()
-                    elif etype == "result":
-                        final_result_event = event
-                        sys.stdout.write(f"\n[subagent] {run_id} ✅ complete\n")
-                        sys.stdout.flush()
-
-        reader = threading.Thread(target=read_stdout, daemon=True)
-        reader.start()
-
-        # Wait with inactivity-based timeout (heartbeat pattern)
-        start = time.time()
-        while proc.poll() is None:
-            current_time = time.time()
-
-            # Check inactivity timeout (resets on each tool use)
-            with activity_lock:
-                idle_time = current_time - last_activity_time
-
-            if idle_time > inactivity_timeout:
-                _kill_process_group(proc)
-                result["error"] = f"Inactivity timeout: no tool use for {inactivity_timeout}s"
-                break
-
-            # Check max timeout ceiling (if set)
-            if max_timeout and (current_time - start) > max_timeout:
-                _kill_process_group(proc)
-                result["error"] = f"Max timeout ceiling reached: {max_timeout}s"
-                break
-
-            time.sleep(0.1)
-
-        # Capture stderr
-        if proc.stderr:
-            stderr_text = proc.stderr.read()
-            if stderr_text:
-                stderr_f.write(stderr_text)
-                stderr_f.flush()
+                    # Skip leading repeats of the tool just printed, dedupe
+                    # the rest within the message, then print in one write
+                    start_index = 0
+                    while start_index < len(tools) and tools[start_index] == last_tool_name_printed:
+                        start_index += 1
+                    seen_tools = set()
+                    new_tools = []
+                    for tool_name in tools[start_index:]:
+                        if tool_name not in seen_tools:
+                            seen_tools.add(tool_name)
+                            new_tools.append(tool_name)
+                    last_tool_name_printed = tools[-1]
+                    if new_tools:
+                        stdout_write(f"{tool_prefix}{', '.join(new_tools)}\n")
+                        stdout_flush()
+            elif etype == "result":
+                final_result_event = event
+                if stream_progress:
+                    stdout_write(complete_line)
+                    stdout_flush()
+
+        stdout_partial = b""
+        # Non-streaming output is a single JSON document; keep it in memory
+        # so the success path doesn't read it back from stdout_log
+        stdout_bytes = bytearray()
+
+        def read_stdout(fd: int) -> bool:
+            """Read available stdout and dispatch complete lines. False at EOF."""
+            nonlocal stdout_partial
+            chunk = os.read(fd, READ_CHUNK_SIZE)
+            if chunk:
+                # Write to log files (full fidelity), once per chunk
+                stdout_f.write(chunk)
+                if stream_f:
+                    stream_f.write(chunk)
+                if debug:
+                    stdout_f.flush()
+                    if stream_f:
+                        stream_f.flush()
+            if not stream_json:
+                stdout_bytes.extend(chunk)
+                return bool(chunk)
+
+            if chunk:
+                data = stdout_partial + chunk
+                end = data.rfind(b"\n") + 1
+                data, stdout_partial = data[:end], data[end:]
+            else:
+                # EOF: a trailing line without a newline is still complete
+                data, stdout_partial = stdout_partial, b""
+            # Lines stay bytes; only prefiltered events are parsed (json/orjson take bytes)
+            for line in data.split(b"\n"):
+                handle_stream_line(line)
+            return bool(chunk)
+
+        # stderr is drained while the child runs (a full pipe would block it)
+        # and kept in memory for the error message
+        stderr_chunks: List[bytes] = []
+
+        def read_stderr(fd: int) -> bool:
+            """Copy available stderr to its log. False at EOF."""
+            chunk = os.read(fd, READ_CHUNK_SIZE)
+            if chunk:
+                stderr_f.write(chunk)
+                stderr_chunks.append(chunk)
+            return bool(chunk)
+
+        if fast_path:
+            stdout_data, stderr_data, result["error"] = _communicate(
+                proc, inactivity_timeout, max_timeout
+            )
+            # Logs written in one go
+            if stdout_data:
+                stdout_f.write(stdout_data)
+                stdout_bytes.extend(stdout_data)
+            if stderr_data:
+                stderr_f.write(stderr_data)
+                stderr_chunks.append(stderr_data)
+        else:
+            # Single-threaded I/O loop: multiplex stdout, stderr and (on Linux)
+            # child exit, waking only for output, a spinner tick or a deadline.
+            sel = selectors.DefaultSelector()
+            sel.register(proc.stdout.fileno(), selectors.EVENT_READ, read_stdout)
+            sel.register(proc.stderr.fileno(), selectors.EVENT_READ, read_stderr)
+            open_pipes = 2
+            pidfd = _open_pidfd(proc)
+            if pidfd is not None:
+                sel.register(pidfd, selectors.EVENT_READ, None)
+
+            def pump(timeout: float) -> bool:
+                """Dispatch ready pipes. Returns False if nothing was ready."""
+                nonlocal open_pipes
+                events = sel.select(timeout)
+                for key, _ in events:
+                    if key.data is None:
+                        # pidfd fired: child exited, poll() picks it up
+                        sel.unregister(key.fd)
+                    elif not key.data(key.fd):
+                        sel.unregister(key.fd)
+                        open_pipes -= 1
+                return bool(events)
+
+            # Wait with inactivity-based timeout (heartbeat pattern)
+            start = time.time()
+            next_spinner_tick = start
+            try:
+                while proc.poll() is None:
+                    current_time = time.time()
+
+                    # Check inactivity timeout (resets on each tool use)
+                    if current_time - last_activity_time > inactivity_timeout:
+                        _kill_process_group(proc)
+                        result["error"] = f"Inactivity timeout: no tool use for {inactivity_timeout}s"
+                        break
+
+                    # Check max timeout ceiling (if set)
+                    if max_timeout and (current_time - start) > max_timeout:
+                        _kill_process_group(proc)
+                        result["error"] = f"Max timeout ceiling reached: {max_timeout}s"
+                        break
+
+                    if show_spinner and current_time >= next_spinner_tick:
+                        stdout_write(spinner_prefix + next(spinner_frames))
+                        stdout_flush()
+                        next_spinner_tick = current_time + SPINNER_INTERVAL
+
+                    deadline = last_activity_time + inactivity_timeout
+                    if max_timeout:
+                        deadline = min(deadline, start + max_timeout)
+                    if show_spinner:
+                        deadline = min(deadline, next_spinner_tick)
+
+                    if open_pipes or pidfd is not None:
+                        pump(max(deadline - current_time, 0))
+                    else:
+                        # Pipes closed and no pidfd: wait for exit or the next deadline
+                        try:
+                            proc.wait(timeout=max(deadline - current_time, 0))
+                        except subprocess.TimeoutExpired:
+                            pass
+
+                # Drain whatever the child wrote before it exited
+                while open_pipes and pump(0):
+                    pass
+            finally:
+                sel.close()
+                if pidfd is not None:
+                    os.close(pidfd)
+                if show_spinner:
+                    sys.stdout.write("\r" + " " * 60 + "\r")
+                    sys.stdout.flush()
 
         # Cleanup
-        stop_spinner.set()
-        reader.join(timeout=2)
-        spinner_thread.join(timeout=1)
         stdout_f.close()
         stderr_f.close()
         if stream_f:
@@ -376,47 +740,28 @@ Guidelines:
 
         # Parse result
         if proc.returncode == 0:
-            if stream_progress:
+            if stream_json:
                 if final_result_event:
                     result["success"] = True
                     result["result"] = final_result_event.get("result", "") or ""
                     result["session_id"] = final_result_event.get("session_id")
                 else:
-                    # Fallback: re-parse log file
-                    last_result = None
-                    if stream_log and os.path.exists(stream_log):
-                        with open(stream_log, "r", encoding="utf-8") as f:
-                            for ln in f:
-                                try:
-                                    ev = json.loads(ln.strip())
-                                    if ev.get("type") == "result":
-                                        last_result = ev
-                                except:
-                                    continue
-                    if last_result:
-                        result["success"] = True
-                        result["result"] = last_result.get("result", "") or ""
-                        result["session_id"] = last_result.get("session_id")
-                    else:
-                        result["success"] = True
-                        result["result"] = f"(no result event; see {stream_log})"
+                    # The reader already saw every line; no result event was sent
+                    result["success"] = True
+                    result["result"] = f"(no result event; see {stream_log or stdout_log})"
             else:
                 # Non-streaming: parse stdout as JSON
-                with open(stdout_log, "r", encoding="utf-8") as f:
-                    stdout_text = f.read()
+                stdout_text = stdout_bytes.decode("utf-8", errors="replace")
                 try:
-                    output = json.loads(stdout_text)
+                    output = _json_loads(stdout_text)
                     result["success"] = True
                     result["result"] = output.get("result", "") or ""
                     result["session_id"] = output.get("session_id")
-                except json.JSONDecodeError:
+                except ValueError:
                     result["success"] = True
                     result["result"] = stdout_text
         else:
-            err_text = ""
-            if os.path.exists(stderr_log):
-                with open(stderr_log, "r", encoding="utf-8") as f:
-                    err_text = f.read()
+            err_text = b"".join(stderr_chunks).decode("utf-8", errors="replace")
             result["error"] = (err_text.strip() or f"Exit code: {proc.returncode}").strip()
 
     except FileNotFoundError:
@@ -424,6 +769,11 @@ Guidelines:
     except Exception as e:
         result["error"] = str(e)
     finally:
+        # Never leave the CLI running if the loop raised (e.g. a serve client hung up)
+        if proc is not None:
+            if proc.poll() is None:
+                _kill_process_group(proc)
+            _close_pipes(proc)
         if debug_log:
             debug_log.write(f"success={result.get('success')} error={result.get('error')}\n")
             debug_log.close()
@@ -441,24 +791,284 @@ Guidelines:
     return result
 
 
+def _serve_worker(
+    listener: "socket.socket",
+    working_dir: Optional[str],
+    pool_size: int,
+    proxy_url: Optional[str],
+) -> None:
+    """Accept connections and run their tasks, one connection at a time."""
+    pool = None
+    if pool_size > 0:
+        try:
+            pool = SubagentPool(pool_size, working_dir, proxy_url=proxy_url)
+        except OSError:
+            # e.g. CLI not installed: cold starts report the error per task
+            pool = None
+    try:
+        while True:
+            conn, _ = listener.accept()
+            try:
+                # Separate read and write files: a "rw" text wrapper discards
+                # read-ahead input on write, dropping pipelined requests
+                with conn, conn.makefile("r", encoding="utf-8", newline="\n") as reader, \
+                        conn.makefile("w", encoding="utf-8", newline="\n") as writer:
+                    for line in reader:
+                        if not line.strip():
+                            continue
+                        try:
+                            request = json.loads(line)
+                            task = request["task"]
+                            if not isinstance(task, str):
+                                raise TypeError("task must be a string")
+                        except (ValueError, KeyError, TypeError):
+                            writer.write(json.dumps({"success": False, "result": "",
+                                                     "error": "Invalid request: expected JSON with a 'task'"}) + "\n")
+                            writer.flush()
+                            continue
+
+                        # Same output as the one-shot CLI, streamed to the client
+                        try:
+                            with contextlib.redirect_stdout(writer):
+                                result = run_subagent(
+                                    task=task,
+                                    working_dir=request.get("cwd") or working_dir,
+                                    allowed_tools=request.get("allowed_tools"),
+                                    inactivity_timeout=request.get("inactivity_timeout", 90),
+                                    max_timeout=request.get("max_timeout"),
+                                    skip_permissions=not request.get("require_permissions", False),
+                                    stream_progress=request.get("stream", False),
+                                    show_prompt=request.get("show_prompt", False),
+                                    max_budget_usd=request.get("max_budget"),
+                                    debug=request.get("debug", False),
+                                    pool=pool,
+                                    proxy_url=proxy_url,
+                                )
+                        except Exception as e:
+                            # A bad request must not take the worker down
+                            result = {"success": False, "result": "", "error": str(e)}
+                        writer.write(json.dumps({"success": result["success"], "result": result["result"],
+                                                 "error": result["error"]}) + "\n")
+                        writer.flush()
+            except OSError:
+                # Client hung up; wait for the next one
+                pass
+    finally:
+        if pool:
+            pool.close()
+
+
+def serve(
+    socket_path: str = DEFAULT_SOCKET_PATH,
+    workers: Optional[int] = None,
+    working_dir: Optional[str] = None,
+    pool_size: int = 1,
+    proxy_url: Optional[str] = None,
+) -> None:
+    """
+    Run a prefork server that accepts tasks over a Unix domain socket.
+
+    The parent binds the socket and forks `workers` children (default: CPU
+    count). Every child blocks in accept() on the shared listener, so the
+    kernel hands each connection to an idle child; busy children never
+    see new connections. Each child keeps `pool_size` warm CLI processes
+    (a SubagentPool for `working_dir`), so a task pays neither Python nor
+    CLI startup.
+
+    Protocol: the client sends one JSON object per line, e.g.
+    {"task": "...", "cwd": "/path", "stream": true}; keys mirror the CLI
+    options (allowed_tools, inactivity_timeout, max_timeout,
+    require_permissions, show_prompt, max_budget, debug). The server
+    streams back the same lines the CLI prints, ending with the JSON
+    result line. A connection may send several tasks in sequence.
+    """
+    import socket  # Only serve mode needs it; keeps one-shot startup lean
+
+    workers = workers or os.cpu_count() or 1
+    _build_env(proxy_url)  # Fail fast on a missing token, before forking
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    if os.path.exists(socket_path):
+        # Only replace a stale socket: never a regular file or a live server
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            sys.exit(f"[subagent] {socket_path} exists and is not a socket")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(socket_path)
+            except OSError:
+                os.unlink(socket_path)
+            else:
+                sys.exit(f"[subagent] another server is already listening on {socket_path}")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(128)
+
+    def fork_worker() -> int:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _serve_worker(listener, working_dir, pool_size, proxy_url)
+            except (KeyboardInterrupt, SystemExit):
+                pass
+            finally:
+                os._exit(0)
+        return pid
+
+    # SIGTERM unwinds through the finally blocks (parent and children)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    children = [fork_worker() for _ in range(workers)]
+    print(f"[subagent] serving on {socket_path} with {workers} workers", flush=True)
+
+    try:
+        while True:
+            pid, _ = os.wait()
+            if pid in children:
+                # Replace a worker that died
+                children[children.index(pid)] = fork_worker()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        listener.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+# CLI options: (flag, type, default, help); type bool marks a switch
+CLI_OPTIONS: List[Tuple[str, Any, Any, str]] = [
+    ("--task", str, None, "Task description (required)"),
+    ("--cwd", str, None, "Working directory"),
+    ("--allowed-tools", str, None, "Comma-separated allowed tools"),
+    ("--inactivity-timeout", int, 90, "Kill if no tool use for N seconds (default: 90)"),
+    ("--max-timeout", int, None, "Optional hard ceiling in seconds (default: unlimited)"),
+    ("--require-permissions", bool, False, "Require permission prompts"),
+    ("--stream", bool, False, "Show tool names as they execute"),
+    ("--show-prompt", bool, False, "Display full prompt before execution"),
+    ("--max-budget", float, None, "Max cost USD"),
+    ("--debug", bool, False, "Debug logs to /tmp/glm-subagent-debug.log"),
+    ("--proxy-url", str, None, "Route API calls through a keepalive proxy (see proxy.py)"),
+]
+
+SERVE_OPTIONS: List[Tuple[str, Any, Any, str]] = [
+    ("--socket", str, DEFAULT_SOCKET_PATH, f"Unix socket path (default: {DEFAULT_SOCKET_PATH})"),
+    ("--workers", int, None, "Worker processes (default: CPU count)"),
+    ("--cwd", str, None, "Working directory the warm CLI processes start in"),
+    ("--pool-size", int, 1, "Warm CLI processes per worker (default: 1, 0 disables)"),
+    ("--proxy-url", str, None, "Route API calls through a keepalive proxy (see proxy.py)"),
+]
+
+CLI_USAGE = (
+    "usage: subagent_template.py --task TASK [options]\n"
+    "       subagent_template.py serve [options]"
+)
+SERVE_USAGE = "usage: subagent_template.py serve [options]"
+CLI_EPILOG = "Set ZAI_API_KEY environment variable before running."
+
+
+def _parse_args(
+    argv: List[str],
+    options: List[Tuple[str, Any, Any, str]],
+    usage: str,
+    description: str,
+    required: Tuple[str, ...] = (),
+) -> SimpleNamespace:
+    """
+    Parse `--flag VALUE`, `--flag=VALUE` and `--switch` options; like
+    argparse, a unique prefix of a flag is accepted.
+
+    Hand-rolled instead of argparse: orchestrators launch this CLI once per
+    task, and argparse's import and parser setup are pure startup cost.
+    Errors exit with status 2 and help with status 0, like argparse.
+    """
+    specs = {flag: type_ for flag, type_, _, _ in options}
+    values = {flag[2:].replace("-", "_"): default for flag, _, default, _ in options}
+
+    def fail(message: str) -> None:
+        sys.stderr.write(f"{usage}\nerror: {message}\n")
+        sys.exit(2)
+
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        i += 1
+        if arg in ("-h", "--help"):
+            lines = [usage, "", description, "", "options:"]
+            for flag, type_, _, help_text in options:
+                name = flag if type_ is bool else f"{flag} {flag[2:].upper().replace('-', '_')}"
+                if len(name) < 26:
+                    lines.append(f"  {name:<26}  {help_text}")
+                else:
+                    lines.extend([f"  {name}", f"{'':<30}{help_text}"])
+            lines.extend(["", CLI_EPILOG])
+            print("\n".join(lines))
+            sys.exit(0)
+
+        flag, has_value, value = arg.partition("=")
+        if flag not in specs and flag.startswith("--"):
+            # Unique prefixes are accepted, as with argparse (--inactivity 60)
+            matches = [known for known in specs if known.startswith(flag)]
+            if len(matches) > 1:
+                fail(f"ambiguous option: {flag} could match {', '.join(matches)}")
+            if matches:
+                flag = matches[0]
+        if flag not in specs:
+            fail(f"unrecognized argument: {arg}")
+        type_ = specs[flag]
+        dest = flag[2:].replace("-", "_")
+        if type_ is bool:
+            if has_value:
+                fail(f"{flag} takes no value")
+            values[dest] = True
+            continue
+        if not has_value:
+            # Like argparse, a following flag is not a value (use --flag=--value)
+            if i >= len(argv) or argv[i].startswith("--"):
+                fail(f"argument {flag}: expected one argument")
+            value = argv[i]
+            i += 1
+        try:
+            values[dest] = type_(value)
+        except ValueError:
+            fail(f"{flag}: invalid {type_.__name__} value: {value!r}")
+
+    for flag in required:
+        if values[flag[2:].replace("-", "_")] is None:
+            fail(f"the following arguments are required: {flag}")
+    return SimpleNamespace(**values)
+
+
+def _serve_main(argv: List[str]) -> None:
+    args = _parse_args(
+        argv, SERVE_OPTIONS, SERVE_USAGE,
+        "Serve sub-agent tasks over a Unix domain socket (prefork workers)",
+    )
+
+    serve(
+        socket_path=args.socket,
+        workers=args.workers,
+        working_dir=args.cwd,
+        pool_size=args.pool_size,
+        proxy_url=args.proxy_url,
+    )
+
+
 def main():
-    parser = argparse.ArgumentParser(
-        description="Claude Code Sub-Agent Wrapper",
-        epilog="Set ZAI_API_KEY environment variable before running."
+    if sys.argv[1:2] == ["serve"]:
+        _serve_main(sys.argv[2:])
+        return
+
+    args = _parse_args(
+        sys.argv[1:], CLI_OPTIONS, CLI_USAGE, "Claude Code Sub-Agent Wrapper",
+        required=("--task",),
     )
-    parser.add_argument("--task", required=True, help="Task description")
-    parser.add_argument("--cwd", help="Working directory")
-    parser.add_argument("--allowed-tools", help="Comma-separated allowed tools")
-    parser.add_argument("--inactivity-timeout", type=int, default=90,
-                        help="Kill if no tool use for N seconds (default: 90)")
-    parser.add_argument("--max-timeout", type=int, default=None,
-                        help="Optional hard ceiling in seconds (default: unlimited)")
-    parser.add_argument("--require-permissions", action="store_true", help="Require permission prompts")
-    parser.add_argument("--stream", action="store_true", help="Show tool names as they execute")
-    parser.add_argument("--show-prompt", action="store_true", help="Display full prompt before execution")
-    parser.add_argument("--max-budget", type=float, help="Max cost USD")
-    parser.add_argument("--debug", action="store_true", help="Debug logs to /tmp/glm-subagent-debug.log")
-    args = parser.parse_args()
 
     result = run_subagent(
         task=args.task,
@@ -471,6 +1081,7 @@ def main():
         show_prompt=args.show_prompt,
         max_budget_usd=args.max_budget,
         debug=args.debug,
+        proxy_url=args.proxy_url,
     )
 
     # Print JSON for orchestrator